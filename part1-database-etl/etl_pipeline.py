@@ -8,6 +8,9 @@ import mysql.connector
 from mysql.connector import Error
 import re
 import logging
+import argparse
+import multiprocessing
+import zlib
 from datetime import datetime
 import os
 from pathlib import Path
@@ -34,6 +37,13 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', '')
 }
 
+# Source id columns are read as text so the same id compares and hashes the
+# same in every file (a numeric column with blanks would otherwise be float)
+ID_COLUMN_DTYPES = {
+    'customer_id': str,
+    'product_id': str
+}
+
 # Data quality tracking
 data_quality_stats = {
     'customers': {
@@ -465,94 +475,187 @@ def load_products(connection, df, original_df):
         cursor.close()
 
 
-def load_orders(connection, sales_df):
+def build_orders(sales_df):
     """
-    Load sales data as orders and order_items
-    Groups transactions by customer and date to create orders
+    Group sales transactions into orders and order_items
+    Each unique (customer_id, transaction_date) combination becomes one order.
+    Rows keep their source index so ids can be assigned in input order.
     """
-    cursor = connection.cursor()
+    orders_dict = {}
+    order_items_list = []
     
-    try:
-        # Clear existing data
-        cursor.execute("DELETE FROM order_items")
-        cursor.execute("DELETE FROM orders")
-        
-        # Group transactions by customer_id and transaction_date to create orders
-        # Each unique (customer_id, transaction_date) combination becomes one order
-        orders_dict = {}
-        order_items_list = []
+    for row_index, transaction in sales_df.iterrows():
+        order_key = (transaction['db_customer_id'], transaction['transaction_date'])
         
-        for _, transaction in sales_df.iterrows():
-            order_key = (transaction['db_customer_id'], transaction['transaction_date'])
-            
-            if order_key not in orders_dict:
-                # Create new order
-                order_total = transaction['subtotal']
-                # Get status from transaction, default to 'Completed' if missing
-                status = transaction.get('status', 'Completed')
-                # Ensure status is valid (max 20 chars per schema)
-                if pd.notna(status):
-                    status = str(status)[:20]
-                else:
-                    status = 'Completed'
-                
-                orders_dict[order_key] = {
-                    'customer_id': transaction['db_customer_id'],
-                    'order_date': transaction['transaction_date'],
-                    'total_amount': order_total,
-                    'status': status
-                }
+        if order_key not in orders_dict:
+            # Get status from transaction, default to 'Completed' if missing
+            status = transaction.get('status', 'Completed')
+            # Ensure status is valid (max 20 chars per schema)
+            if pd.notna(status):
+                status = str(status)[:20]
             else:
-                # Add to existing order total
-                orders_dict[order_key]['total_amount'] += transaction['subtotal']
+                status = 'Completed'
             
-            # Add order item
-            order_items_list.append({
-                'order_key': order_key,
-                'product_id': transaction['db_product_id'],
-                'quantity': transaction['quantity'],
-                'unit_price': transaction['unit_price'],
-                'subtotal': transaction['subtotal']
-            })
-        
-        # Insert orders
-        order_id_map = {}
+            orders_dict[order_key] = {
+                'first_index': row_index,
+                'customer_id': int(transaction['db_customer_id']),
+                'order_date': transaction['transaction_date'],
+                'total_amount': transaction['subtotal'],
+                'status': status
+            }
+        else:
+            # Add to existing order total
+            orders_dict[order_key]['total_amount'] += transaction['subtotal']
+        
+        order_items_list.append({
+            'row_index': row_index,
+            'order_key': order_key,
+            'product_id': int(transaction['db_product_id']),
+            'quantity': int(transaction['quantity']),
+            'unit_price': float(transaction['unit_price']),
+            'subtotal': float(transaction['subtotal'])
+        })
+    
+    return orders_dict, order_items_list
+
+
+def order_numbering_keys(orders_dict, order_items_list):
+    """
+    Return the sorted source row indexes that decide the ids of these orders
+    and order items: (first_index of each order, row_index of each item)
+    """
+    first_indexes = sorted(order['first_index'] for order in orders_dict.values())
+    row_indexes = sorted(item['row_index'] for item in order_items_list)
+    return first_indexes, row_indexes
+
+
+def rank_keys(key_lists):
+    """
+    Number the keys of several sorted lists 1..n in overall key order
+    Returns one list of ids per input list, aligned with its keys
+    """
+    ranked = sorted(
+        (key, list_index, position)
+        for list_index, keys in enumerate(key_lists)
+        for position, key in enumerate(keys)
+    )
+    ids = [[0] * len(keys) for keys in key_lists]
+    for new_id, (_, list_index, position) in enumerate(ranked, start=1):
+        ids[list_index][position] = new_id
+    return ids
+
+
+def number_shards(shard_keys):
+    """
+    Assign order_id and order_item_id in source row order across shards
+    Takes each shard's order_numbering_keys() and returns its
+    (order_ids, order_item_ids), so a single process and a sharded run
+    number their rows identically.
+    """
+    order_ids = rank_keys([first_indexes for first_indexes, _ in shard_keys])
+    order_item_ids = rank_keys([row_indexes for _, row_indexes in shard_keys])
+    return list(zip(order_ids, order_item_ids))
+
+
+def apply_order_ids(orders_dict, order_items_list, order_ids, order_item_ids):
+    """
+    Store ids from number_shards() on the orders and order items they belong to
+    """
+    orders = sorted(orders_dict.values(), key=lambda order: order['first_index'])
+    for order, order_id in zip(orders, order_ids):
+        order['order_id'] = order_id
+    
+    items = sorted(order_items_list, key=lambda item: item['row_index'])
+    for item, order_item_id in zip(items, order_item_ids):
+        item['order_item_id'] = order_item_id
+
+
+def insert_orders(connection, orders_dict, order_items_list):
+    """
+    Insert orders and order_items that already carry their ids
+    Does not commit; the caller owns the transaction.
+    Returns the (orders, order_items) row counts reported by the database
+    """
+    cursor = connection.cursor()
+    
+    def insert_rows(query, rows):
+        if not rows:
+            return 0
+        cursor.executemany(query, rows)
+        return cursor.rowcount
+    
+    try:
         insert_order_query = """
-            INSERT INTO orders (customer_id, order_date, total_amount, status)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO orders (order_id, customer_id, order_date, total_amount, status)
+            VALUES (%s, %s, %s, %s, %s)
         """
-        
-        for order_key, order_data in orders_dict.items():
-            cursor.execute(insert_order_query, (
+        orders_inserted = insert_rows(insert_order_query, [
+            (
+                order_data['order_id'],
                 order_data['customer_id'],
                 order_data['order_date'],
-                order_data['total_amount'],
+                float(order_data['total_amount']),
                 order_data['status']
-            ))
-            order_id_map[order_key] = cursor.lastrowid
-        
-        connection.commit()
-        logging.info(f"Created {len(orders_dict)} orders")
+            )
+            for order_data in orders_dict.values()
+        ])
         
-        # Insert order items
         insert_item_query = """
-            INSERT INTO order_items (order_id, product_id, quantity, unit_price, subtotal)
-            VALUES (%s, %s, %s, %s, %s)
+            INSERT INTO order_items (order_item_id, order_id, product_id, quantity, unit_price, subtotal)
+            VALUES (%s, %s, %s, %s, %s, %s)
         """
-        
-        items_inserted = 0
-        for item in order_items_list:
-            order_id = order_id_map[item['order_key']]
-            cursor.execute(insert_item_query, (
-                order_id,
+        items_inserted = insert_rows(insert_item_query, [
+            (
+                item['order_item_id'],
+                orders_dict[item['order_key']]['order_id'],
                 item['product_id'],
                 item['quantity'],
                 item['unit_price'],
                 item['subtotal']
-            ))
-            items_inserted += 1
+            )
+            for item in order_items_list
+        ])
+        
+        return orders_inserted, items_inserted
+        
+    finally:
+        cursor.close()
+
+
+def clear_orders(connection):
+    """
+    Remove existing orders and order_items
+    """
+    cursor = connection.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM order_items")
+        cursor.execute("DELETE FROM orders")
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def load_orders(connection, sales_df):
+    """
+    Load sales data as orders and order_items
+    Groups transactions by customer and date to create orders
+    """
+    cursor = connection.cursor()
+    
+    try:
+        # Clear existing data in the same transaction as the inserts, so a
+        # failed load rolls back to the previous orders
+        cursor.execute("DELETE FROM order_items")
+        cursor.execute("DELETE FROM orders")
+        
+        orders_dict, order_items_list = build_orders(sales_df)
+        [(order_ids, order_item_ids)] = number_shards([order_numbering_keys(orders_dict, order_items_list)])
+        apply_order_ids(orders_dict, order_items_list, order_ids, order_item_ids)
+        orders_inserted, items_inserted = insert_orders(connection, orders_dict, order_items_list)
         
         connection.commit()
+        logging.info(f"Created {orders_inserted} orders")
         data_quality_stats['sales']['records_loaded'] = items_inserted
         logging.info(f"Inserted {items_inserted} order items")
         
@@ -564,6 +667,257 @@ def load_orders(connection, sales_df):
         cursor.close()
 
 
+def empty_stats():
+    """
+    Return a zeroed data quality stats entry for one table
+    """
+    return {
+        'total_read': 0,
+        'duplicates_removed': 0,
+        'missing_values_handled': 0,
+        'records_loaded': 0
+    }
+
+
+def shard_for(customer_id, num_shards):
+    """
+    Return the shard index for an original customer_id
+    Uses crc32 rather than hash() so every worker process agrees on it.
+    Ids are hashed as text, so sources are read with ID_COLUMN_DTYPES.
+    Rows with a missing customer_id go to shard 0, where they are dropped.
+    """
+    if pd.isna(customer_id) or customer_id == '':
+        return 0
+    return zlib.crc32(str(customer_id).encode('utf-8')) % num_shards
+
+
+def partition_sales(sales_df, customer_id_map, num_shards):
+    """
+    Hash-partition sales data and the customer key map by customer_id
+    Duplicate transactions are removed here, before partitioning, because
+    copies of one transaction_id may carry different customer_ids.
+    Returns the list of (sales_slice, customer_id_map_slice) per shard.
+    """
+    data_quality_stats['sales']['total_read'] = len(sales_df)
+    
+    initial_count = len(sales_df)
+    sales_df = sales_df.drop_duplicates(subset=['transaction_id'], keep='first')
+    duplicates = initial_count - len(sales_df)
+    data_quality_stats['sales']['duplicates_removed'] = duplicates
+    logging.info(f"Removed {duplicates} duplicate transactions")
+    
+    sales_shard = sales_df['customer_id'].apply(lambda cid: shard_for(cid, num_shards))
+    
+    shards = []
+    for shard_index in range(num_shards):
+        map_slice = {
+            original_id: db_id
+            for original_id, db_id in customer_id_map.items()
+            if shard_for(original_id, num_shards) == shard_index
+        }
+        shards.append((sales_df[sales_shard == shard_index].copy(), map_slice))
+    
+    return shards
+
+
+def transform_shard(shard_index, sales_df, customer_id_map, product_id_map):
+    """
+    Clean one shard of sales data and group it into orders
+    Returns the shard's orders, order items and sales data quality stats
+    """
+    # Count this shard on its own; restore the caller's stats afterwards so
+    # the function can also run in the coordinator process
+    previous_stats = data_quality_stats['sales']
+    data_quality_stats['sales'] = empty_stats()
+    try:
+        logging.info(f"Shard {shard_index}: transforming {len(sales_df)} transactions")
+        sales_clean = extract_sales(sales_df, customer_id_map, product_id_map)
+        orders_dict, order_items_list = build_orders(sales_clean)
+        shard_stats = data_quality_stats['sales']
+    finally:
+        data_quality_stats['sales'] = previous_stats
+    
+    return orders_dict, order_items_list, shard_stats
+
+
+def merge_shard_stats(shard_stats_list):
+    """
+    Add per-shard sales stats to the coordinator's sales stats
+    total_read and duplicates_removed are counted by partition_sales().
+    """
+    for shard_stats in shard_stats_list:
+        data_quality_stats['sales']['missing_values_handled'] += shard_stats['missing_values_handled']
+
+
+def shard_worker(shard_index, conn, sales_df, customer_id_map, product_id_map):
+    """
+    Worker process for one shard
+    Sends the coordinator only the row indexes that number its orders,
+    receives its ids, inserts in one transaction over its own connection and
+    commits or rolls back as told. The built rows never leave this process.
+    Every reply is a (status, payload) tuple.
+    """
+    connection = None
+    
+    try:
+        orders_dict, order_items_list, shard_stats = transform_shard(
+            shard_index, sales_df, customer_id_map, product_id_map
+        )
+        conn.send(('transformed', (order_numbering_keys(orders_dict, order_items_list), shard_stats)))
+        
+        ids = conn.recv()
+        if ids is None:
+            return
+        apply_order_ids(orders_dict, order_items_list, *ids)
+        
+        connection = mysql.connector.connect(**DB_CONFIG)
+        orders_inserted, items_inserted = insert_orders(connection, orders_dict, order_items_list)
+        conn.send(('inserted', (orders_inserted, items_inserted)))
+        
+        if conn.recv() != 'commit':
+            connection.rollback()
+            return
+        connection.commit()
+        
+        logging.info(f"Shard {shard_index}: committed {orders_inserted} orders, {items_inserted} order items")
+        conn.send(('committed', {
+            'shard': shard_index,
+            'orders': orders_inserted,
+            'order_items': items_inserted
+        }))
+        
+    except EOFError:
+        # Coordinator gave up; the open transaction is rolled back on close
+        logging.warning(f"Shard {shard_index}: coordinator closed the connection")
+    except Exception as e:
+        logging.error(f"Shard {shard_index}: {e}")
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        if connection is not None and connection.is_connected():
+            connection.close()
+        conn.close()
+
+
+def collect_replies(workers, expected_status):
+    """
+    Receive one reply from every worker in workers (shard index -> pipe)
+    Waits for all of them before returning, so no shard is still working when
+    the coordinator acts on a failure. A worker that exits without replying
+    counts as failed.
+    Returns ({shard_index: payload}, [error messages])
+    """
+    replies = {}
+    errors = []
+    
+    for shard_index, conn in workers.items():
+        try:
+            status, payload = conn.recv()
+        except EOFError:
+            status, payload = 'error', "worker exited without replying"
+        
+        if status == expected_status:
+            replies[shard_index] = payload
+        else:
+            errors.append(f"Shard {shard_index}: {payload}")
+    
+    return replies, errors
+
+
+def check_commit_markers(markers, expected):
+    """
+    Compare shard commit markers with the rows assigned to each shard
+    expected maps shard index to its (orders, order_items) counts.
+    Raises RuntimeError if a shard is missing or committed a different count.
+    """
+    committed = {marker['shard']: (marker['orders'], marker['order_items']) for marker in markers}
+    
+    for shard_index, counts in expected.items():
+        if shard_index not in committed:
+            raise RuntimeError(f"Shard {shard_index} returned no commit marker")
+        if committed[shard_index] != counts:
+            raise RuntimeError(
+                f"Shard {shard_index} committed {committed[shard_index]} (orders, order_items), "
+                f"expected {counts}"
+            )
+
+
+def load_orders_sharded(connection, sales_df, customer_id_map, product_id_map, num_workers):
+    """
+    Transform and load sales data with one worker process per customer shard
+    The coordinator numbers orders across all shards in source row order and
+    merges the per-shard stats, so the result matches a single-process run.
+    Shards commit only after every shard has inserted its rows.
+    """
+    logging.info(f"Running sales load with {num_workers} sharded workers")
+    clear_orders(connection)
+    
+    shards = partition_sales(sales_df, customer_id_map, num_workers)
+    context = multiprocessing.get_context('spawn')
+    workers = {}
+    processes = []
+    
+    try:
+        for shard_index, (shard_df, map_slice) in enumerate(shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=shard_worker,
+                args=(shard_index, child_conn, shard_df, map_slice, product_id_map)
+            )
+            process.start()
+            # Drop our copy of the worker's end so recv() raises EOFError if it dies
+            child_conn.close()
+            workers[shard_index] = parent_conn
+            processes.append(process)
+        
+        # Transform: workers return numbering keys and stats, not rows
+        transformed, errors = collect_replies(workers, 'transformed')
+        if errors:
+            for shard_index in transformed:
+                workers[shard_index].send(None)
+            raise RuntimeError(f"Sharded transform failed: {'; '.join(errors)}")
+        
+        merge_shard_stats([shard_stats for _, shard_stats in transformed.values()])
+        shard_keys = [transformed[shard_index][0] for shard_index in range(num_workers)]
+        expected = {
+            shard_index: (len(first_indexes), len(row_indexes))
+            for shard_index, (first_indexes, row_indexes) in enumerate(shard_keys)
+        }
+        
+        # Insert: every shard holds its rows in an open transaction
+        for shard_index, ids in enumerate(number_shards(shard_keys)):
+            workers[shard_index].send(ids)
+        inserted, errors = collect_replies(workers, 'inserted')
+        if errors:
+            for shard_index in inserted:
+                workers[shard_index].send('rollback')
+            raise RuntimeError(f"Sharded insert failed: {'; '.join(errors)}")
+        
+        # Commit: only now can a failure leave committed rows behind
+        for conn in workers.values():
+            conn.send('commit')
+        markers, errors = collect_replies(workers, 'committed')
+        try:
+            if errors:
+                raise RuntimeError(f"Sharded commit failed: {'; '.join(errors)}")
+            check_commit_markers(list(markers.values()), expected)
+        except RuntimeError as e:
+            logging.error(f"Error loading sharded orders: {e}")
+            clear_orders(connection)
+            raise
+        
+    finally:
+        for conn in workers.values():
+            conn.close()
+        for process in processes:
+            process.join()
+    
+    total_orders = sum(marker['orders'] for marker in markers.values())
+    items_inserted = sum(marker['order_items'] for marker in markers.values())
+    data_quality_stats['sales']['records_loaded'] = items_inserted
+    logging.info(f"Created {total_orders} orders")
+    logging.info(f"Inserted {items_inserted} order items")
+
+
 def generate_data_quality_report():
     """
     Generate data quality report
@@ -597,9 +951,10 @@ def generate_data_quality_report():
     return report_text
 
 
-def main():
+def main(num_workers=1):
     """
     Main ETL pipeline execution
+    With num_workers > 1 sales are loaded by hash-sharded worker processes
     """
     logging.info("Starting FlexiMart ETL Pipeline")
     
@@ -621,9 +976,9 @@ def main():
             project_root = script_dir.parent
             data_dir = project_root / 'data'
             
-            customers_df = pd.read_csv(data_dir / 'customers_raw.csv')
-            products_df = pd.read_csv(data_dir / 'products_raw.csv')
-            sales_df = pd.read_csv(data_dir / 'sales_raw.csv')
+            customers_df = pd.read_csv(data_dir / 'customers_raw.csv', dtype=ID_COLUMN_DTYPES)
+            products_df = pd.read_csv(data_dir / 'products_raw.csv', dtype=ID_COLUMN_DTYPES)
+            sales_df = pd.read_csv(data_dir / 'sales_raw.csv', dtype=ID_COLUMN_DTYPES)
             
             # TRANSFORM: Clean and transform data
             customers_clean = extract_customers(customers_df)
@@ -634,8 +989,11 @@ def main():
             product_id_map = load_products(connection, products_clean, products_df)
             
             # Transform and load sales data
-            sales_clean = extract_sales(sales_df, customer_id_map, product_id_map)
-            load_orders(connection, sales_clean)
+            if num_workers > 1:
+                load_orders_sharded(connection, sales_df, customer_id_map, product_id_map, num_workers)
+            else:
+                sales_clean = extract_sales(sales_df, customer_id_map, product_id_map)
+                load_orders(connection, sales_clean)
             
             logging.info("ETL Pipeline completed successfully")
             
@@ -655,4 +1013,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="FlexiMart ETL Pipeline")
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="number of worker processes; sales are sharded by customer_id when > 1"
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    main(num_workers=args.workers)
@@ -0,0 +1,194 @@
+"""
+Tests for the FlexiMart ETL Pipeline
+Checks that a sharded sales load builds the same rows as a single-process run.
+The database is replaced by FakeConnection, which records inserted rows.
+"""
+
+import io
+import re
+
+import pandas as pd
+import pytest
+
+import etl_pipeline
+
+
+CUSTOMERS_CSV = """customer_id,customer_name,email,phone,city,registration_date
+C001,Rahul Sharma,rahul.sharma@gmail.com,9876543210,Bangalore,2023-01-15
+C002,Priya Patel,priya.patel@yahoo.com,+91-9988776655,Mumbai,2023-02-20
+C003,Amit Kumar,,9765432109,Delhi,2023-03-10
+C004,Sneha Reddy,sneha.reddy@gmail.com,9123456789,Hyderabad,15/04/2023
+C005,Vikram Singh,vikram.singh@outlook.com,,Chennai,2023-05-22
+C006,Anjali Mehta,anjali.mehta@gmail.com,9876501234,,2023-06-18
+C007,Rahul Sharma,rahul.sharma@gmail.com,9876543210,Bangalore,2023-01-15
+C008,Karthik Nair,karthik.nair@yahoo.com,9988112233,Kochi,2023-08-30
+"""
+
+PRODUCTS_CSV = """product_id,product_name,category,price,stock_quantity
+P001,Samsung Galaxy S21,Electronics,45999.00,150
+P002,Nike Running Shoes,fashion,3499.00,80
+P003,Apple MacBook Pro,ELECTRONICS,,45
+P004,Levi's Jeans,Fashion,2999.00,120
+P005,Sony Headphones,electronics,1999.00,
+"""
+
+SALES_CSV = """transaction_id,customer_id,product_id,quantity,unit_price,transaction_date,status
+T001,C001,P001,1,45999.00,2024-01-15,Completed
+T002,C002,P004,2,2999.00,2024-01-16,Completed
+T003,C004,P002,1,3499.00,15/01/2024,Completed
+T004,,P002,1,3499.00,2024-01-18,Pending
+T005,C001,P004,1,2999.00,2024-01-15,Completed
+T006,C005,P003,1,52999.00,2024-01-20,Completed
+T007,C006,P005,3,1999.00,02/22/2024,Completed
+T008,C002,P002,1,,2024-01-22,Completed
+T002,C008,P001,1,45999.00,2024-01-23,Completed
+T009,C003,P001,1,45999.00,2024-01-24,Completed
+T010,C008,P005,2,1999.00,2024-01-25,
+T011,C008,P001,1,45999.00,2024-01-25,Pending
+T012,C006,P004,,2999.00,2024-02-01,Completed
+T013,C007,P002,1,3499.00,2024-02-02,Completed
+T014,C004,,1,3499.00,2024-02-03,Completed
+"""
+
+
+class FakeCursor:
+    """
+    Cursor that records INSERTs and answers the id lookups in load_customers
+    and load_products; AUTO_INCREMENT ids start at 1 in insertion order
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.rowcount = -1
+        self.result = []
+
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        if query.startswith('DELETE FROM'):
+            self.tables[query.split()[2]] = []
+        elif query.startswith('SELECT customer_id, email FROM customers'):
+            self.result = [(db_id, row[2]) for db_id, row in enumerate(self.tables['customers'], start=1)]
+        elif query.startswith('SELECT product_id, product_name FROM products'):
+            self.result = [(db_id, row[0]) for db_id, row in enumerate(self.tables['products'], start=1)]
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def executemany(self, query, rows):
+        table = re.search(r'INSERT INTO (\w+)', query).group(1)
+        self.tables.setdefault(table, []).extend(rows)
+        self.rowcount = len(rows)
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.tables = {}
+
+    def cursor(self):
+        return FakeCursor(self.tables)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def read_csv(text, numeric_ids=False):
+    if numeric_ids:
+        # C001 -> 1, P001 -> 1; blank ids leave these columns float without the dtypes
+        text = re.sub(r'(^|,)[CP]00', r'\1', text, flags=re.MULTILINE)
+    return pd.read_csv(io.StringIO(text), dtype=etl_pipeline.ID_COLUMN_DTYPES)
+
+
+def id_maps(numeric_ids=False):
+    customers_df = read_csv(CUSTOMERS_CSV, numeric_ids)
+    products_df = read_csv(PRODUCTS_CSV, numeric_ids)
+    connection = FakeConnection()
+    customer_id_map = etl_pipeline.load_customers(
+        connection, etl_pipeline.extract_customers(customers_df), customers_df
+    )
+    product_id_map = etl_pipeline.load_products(
+        connection, etl_pipeline.extract_products(products_df), products_df
+    )
+    return customer_id_map, product_id_map
+
+
+def single_process_run(sales_df, customer_id_map, product_id_map):
+    etl_pipeline.data_quality_stats['sales'] = etl_pipeline.empty_stats()
+    connection = FakeConnection()
+    sales_clean = etl_pipeline.extract_sales(sales_df, customer_id_map, product_id_map)
+    etl_pipeline.load_orders(connection, sales_clean)
+    return connection.tables, dict(etl_pipeline.data_quality_stats['sales'])
+
+
+def sharded_run(sales_df, customer_id_map, product_id_map, num_shards):
+    """
+    Same steps as load_orders_sharded and shard_worker, run in-process
+    """
+    etl_pipeline.data_quality_stats['sales'] = etl_pipeline.empty_stats()
+    shards = etl_pipeline.partition_sales(sales_df, customer_id_map, num_shards)
+    results = [
+        etl_pipeline.transform_shard(shard_index, shard_df, map_slice, product_id_map)
+        for shard_index, (shard_df, map_slice) in enumerate(shards)
+    ]
+    etl_pipeline.merge_shard_stats([shard_stats for _, _, shard_stats in results])
+    shard_ids = etl_pipeline.number_shards([
+        etl_pipeline.order_numbering_keys(orders_dict, order_items_list)
+        for orders_dict, order_items_list, _ in results
+    ])
+
+    connection = FakeConnection()
+    items_inserted = 0
+    for (orders_dict, order_items_list, _), ids in zip(results, shard_ids):
+        etl_pipeline.apply_order_ids(orders_dict, order_items_list, *ids)
+        items_inserted += etl_pipeline.insert_orders(connection, orders_dict, order_items_list)[1]
+    etl_pipeline.data_quality_stats['sales']['records_loaded'] = items_inserted
+
+    return connection.tables, dict(etl_pipeline.data_quality_stats['sales']), shards
+
+
+def sorted_rows(tables):
+    return {table: sorted(rows) for table, rows in tables.items() if rows}
+
+
+@pytest.mark.parametrize('numeric_ids', [False, True])
+@pytest.mark.parametrize('num_shards', [1, 2, 3, 20])
+def test_sharded_run_matches_single_process(num_shards, numeric_ids):
+    customer_id_map, product_id_map = id_maps(numeric_ids)
+    sales_df = read_csv(SALES_CSV, numeric_ids)
+
+    single_tables, single_stats = single_process_run(sales_df.copy(), customer_id_map, product_id_map)
+    sharded_tables, sharded_stats, shards = sharded_run(
+        sales_df.copy(), customer_id_map, product_id_map, num_shards
+    )
+
+    assert single_tables['orders']
+    assert sorted_rows(sharded_tables) == sorted_rows(single_tables)
+    assert sharded_stats == single_stats
+    if num_shards > len(customer_id_map):
+        assert any(shard_df.empty for shard_df, _ in shards)
+
+
+def test_number_shards_follows_source_row_order():
+    shard_ids = etl_pipeline.number_shards([
+        ([0, 5], [0, 5, 6]),
+        ([], []),
+        ([2], [2, 3])
+    ])
+
+    assert shard_ids == [([1, 3], [1, 4, 5]), ([], []), ([2], [2, 3])]
+
+
+def test_rows_with_missing_customer_go_to_shard_zero():
+    customer_id_map, _ = id_maps()
+    sales_df = read_csv(SALES_CSV)
+
+    shards = etl_pipeline.partition_sales(sales_df, customer_id_map, 4)
+
+    assert 'T004' in set(shards[0][0]['transaction_id'])